@@ -0,0 +1,129 @@
+"""Compare DOCX extraction paths on a large generated document.
+
+    python benchmarks/bench_docx.py --paragraphs 200000
+
+Each extractor runs in a fresh process so peak memory (max RSS) is
+measured independently. The python-docx baseline is skipped when the
+package is not installed.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+MC_NS = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/footnotes.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.footnotes+xml"/>
+<Override PartName="/word/header1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"/>
+</Types>"""
+
+PACKAGE_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/footnotes" Target="footnotes.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/header" Target="header1.xml"/>
+</Relationships>"""
+
+SENTENCE = "The quick brown fox jumps over the lazy dog while the committee reviews paragraph {n}."
+
+
+def paragraph(text):
+    return f'<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+
+def text_box(text):
+    return (
+        f'<w:p><w:r><mc:AlternateContent><mc:Choice Requires="wps"><w:drawing><w:txbxContent>{paragraph(text)}'
+        f'</w:txbxContent></w:drawing></mc:Choice><mc:Fallback><w:pict><w:txbxContent>{paragraph(text)}'
+        f'</w:txbxContent></w:pict></mc:Fallback></mc:AlternateContent></w:r></w:p>'
+    )
+
+
+def build_docx(path, paragraphs):
+    """Write a DOCX with body paragraphs, a table every 100 paragraphs, a text box, a footnote and a header"""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", PACKAGE_RELS)
+        archive.writestr("word/_rels/document.xml.rels", DOCUMENT_RELS)
+        with archive.open("word/document.xml", "w", force_zip64=True) as out:
+            out.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document xmlns:w="{W_NS}" xmlns:mc="{MC_NS}"><w:body>'.encode())
+            out.write(text_box("Text box content hidden from the paragraph list.").encode())
+            for n in range(paragraphs):
+                out.write(paragraph(SENTENCE.format(n=n)).encode())
+                if n % 100 == 99:
+                    out.write(f'<w:tbl><w:tr><w:tc>{paragraph(f"Table cell {n}.")}</w:tc></w:tr></w:tbl>'.encode())
+            out.write(b"</w:body></w:document>")
+        archive.writestr("word/footnotes.xml", f'<w:footnotes xmlns:w="{W_NS}"><w:footnote w:id="1">{paragraph("Footnote content.")}</w:footnote></w:footnotes>')
+        archive.writestr("word/header1.xml", f'<w:hdr xmlns:w="{W_NS}">{paragraph("Header content.")}</w:hdr>')
+
+
+def run_extractor(name, path):
+    """Run one extractor in this process and print its stats as JSON"""
+    import resource
+
+    if name == "streaming":
+        from plagr_extract import extract_text_from_docx
+        extract = extract_text_from_docx
+    else:
+        from docx import Document
+
+        def extract(file):
+            return "\n".join([paragraph.text for paragraph in Document(file).paragraphs]).strip()
+
+    started = time.perf_counter()
+    text = extract(path)
+    elapsed = time.perf_counter() - started
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "max_rss_mb": max_rss_kb / 1024, "chars": len(text)}))
+
+
+def measure(name, path):
+    completed = subprocess.run(
+        [sys.executable, __file__, "--run", name, path],
+        capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        return None
+    return json.loads(completed.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=200000)
+    parser.add_argument("--run", nargs=2, metavar=("EXTRACTOR", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_extractor(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.docx")
+        build_docx(path, args.paragraphs)
+        print(f"{args.paragraphs} paragraphs, {os.path.getsize(path) / 1e6:.1f} MB compressed")
+        for name in ("python-docx", "streaming"):
+            stats = measure(name, path)
+            if stats is None:
+                print(f"{name:>12}: skipped (not installed or failed)")
+                continue
+            print(f"{name:>12}: {stats['seconds']:.2f}s  peak {stats['max_rss_mb']:.0f} MB  {stats['chars']} chars")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Measure sharded corpus search throughput as the shard count grows.
+
+    python benchmarks/bench_search.py --documents 20000 --queries 200
+
+Queries are sent in batches to amortize the fan-out; throughput should
+scale with shard count up to the number of cores.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plagr_search import ShardedCorpus
+
+WORDS = [f"w{n}" for n in range(5000)]
+
+
+def make_text(rng, sentences=10, words=15):
+    return ". ".join(" ".join(rng.choices(WORDS, k=words)) for _ in range(sentences)) + "."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=20, help="queries per fan-out")
+    parser.add_argument("--shards", type=int, nargs="+", default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    documents = [(f"doc{n}", make_text(rng)) for n in range(args.documents)]
+    queries = [make_text(rng) for _ in range(args.queries)]
+    shard_counts = args.shards or sorted({1, 2, 4, os.cpu_count() or 1})
+
+    print(f"{args.documents} documents, {args.queries} queries, {os.cpu_count()} CPU(s)")
+    for shards in shard_counts:
+        with ShardedCorpus.start(shards) as corpus:
+            started = time.perf_counter()
+            corpus.add(documents)
+            indexed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for start in range(0, len(queries), args.batch):
+                corpus.search_many(queries[start:start + args.batch])
+            elapsed = time.perf_counter() - started
+        print(f"{shards:>3} shard(s): index {indexed:.1f}s  {len(queries) / elapsed:.1f} queries/s")
+
+
+if __name__ == "__main__":
+    main()
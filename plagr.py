@@ -1,21 +1,25 @@
+import csv
+import heapq
+import io
+
 import streamlit as st
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import pandas as pd
-import re
-
-# Document processing libraries
-try:
-    import PyPDF2
-    PDF_SUPPORT = True
-except ImportError:
-    PDF_SUPPORT = False
 
-try:
-    from docx import Document
-    DOCX_SUPPORT = True
-except ImportError:
-    DOCX_SUPPORT = False
+from plagr_core import (
+    DEFAULT_BACKEND,
+    VECTORIZER_BACKENDS,
+    SimilarityGraph,
+    algorithm_key,
+    content_hash,
+    get_common_sentences,
+    pair_key,
+    risk_level,
+    score_unique_pairs,
+    text_hash,
+)
+from plagr_extract import PDF_SUPPORT, ExtractionError
+from plagr_extract import extract_text_from_file as _extract_text_from_file
+from plagr_store import ResultStore
 
 # page configuration
 st.set_page_config(
@@ -39,6 +43,23 @@ C = {
     "bar_bg": "#e0e0e0"
 }
 
+# UI labels for the vectorizer backends
+BACKEND_LABELS = {
+    "word": "WORD TF-IDF",
+    "char": "CHARACTER N-GRAM",
+    "hashing": "HASHING",
+}
+
+# Report colors per risk band
+RISK_COLORS = {
+    "CRITICAL": "#c0392b",  # Dark red for critical
+    "MODERATE": "#f39c12",  # Orange for moderate
+    "LOW": "#27ae60",  # Green for low
+}
+
+# Pairs below the cluster threshold kept for the report, best first
+REPORT_TOP_PAIRS = 50
+
 st.markdown(f"""
 <style>
     /* === SWISS DESIGN SYSTEM === */
@@ -479,6 +500,18 @@ if 'analyzed' not in st.session_state:
     st.session_state.analyzed = False
 if 'results' not in st.session_state:
     st.session_state.results = None
+if 'texts' not in st.session_state:
+    st.session_state.texts = []
+if 'total_pairs' not in st.session_state:
+    st.session_state.total_pairs = 0
+if 'report_csv' not in st.session_state:
+    st.session_state.report_csv = b""
+if 'clusters' not in st.session_state:
+    st.session_state.clusters = []
+if 'backend' not in st.session_state:
+    st.session_state.backend = DEFAULT_BACKEND
+if 'reused' not in st.session_state:
+    st.session_state.reused = 0
 
 def render_doc_label(label):
     """Render a document label with Swiss design styling"""
@@ -504,87 +537,34 @@ def render_section(number, title):
     """, unsafe_allow_html=True)
     st.markdown('<div class="geo-line"></div>', unsafe_allow_html=True)
 
-def vectorize(texts):
-    return TfidfVectorizer().fit_transform(texts).toarray()
-
-def extract_text_from_pdf(file):
-    """Extract text from PDF file"""
+def extract_text_from_file(file):
+    """Extract text from uploaded file, reporting failures in the UI"""
     try:
-        pdf_reader = PyPDF2.PdfReader(file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
-    except Exception as e:
-        st.error(f"Error reading PDF: {str(e)}")
+        return _extract_text_from_file(file)
+    except ExtractionError as e:
+        st.error(str(e))
         return None
 
-def extract_text_from_docx(file):
-    """Extract text from Word document"""
-    try:
-        doc = Document(file)
-        text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-        return text.strip()
-    except Exception as e:
-        st.error(f"Error reading Word document: {str(e)}")
-        return None
+@st.cache_resource
+def get_store():
+    """Result store shared by every session of this app"""
+    return ResultStore()
 
-def extract_text_from_file(file):
-    """Extract text from uploaded file based on file type"""
-    file_extension = file.name.split('.')[-1].lower()
-    
-    if file_extension == 'txt':
-        try:
-            return file.read().decode("utf-8", errors="ignore")
-        except Exception as e:
-            st.error(f"Error reading text file: {str(e)}")
-            return None
-    
-    elif file_extension == 'pdf':
-        if not PDF_SUPPORT:
-            st.error("PDF support not available. Please install PyPDF2: pip install PyPDF2")
-            return None
-        return extract_text_from_pdf(file)
-    
-    elif file_extension in ['docx', 'doc']:
-        if not DOCX_SUPPORT:
-            st.error("Word document support not available. Please install python-docx: pip install python-docx")
-            return None
-        return extract_text_from_docx(file)
-    
-    else:
-        st.error(f"Unsupported file type: {file_extension}")
-        return None
+@st.cache_data(show_spinner=False)
+def find_common_sentences(text_a, text_b, backend):
+    """Sentence matches for a pair, reused from earlier scans when stored"""
+    store = get_store()
+    algorithm = algorithm_key(backend)
+    hash_a, hash_b = text_hash(text_a), text_hash(text_b)
+    matches = store.sentence_matches(hash_a, hash_b, algorithm)
+    if matches is None:
+        matches = get_common_sentences(text_a, text_b, backend=backend)
+        store.save_sentence_matches(hash_a, hash_b, matches, algorithm)
+    return matches
 
-def similarity(doc1, doc2):
-    return cosine_similarity([doc1], [doc2])[0][0]
-
-def get_common_sentences(text1, text2, threshold=0.65):
-    # Split by simple punctuation
-    s1 = [s.strip() for s in re.split(r'[.!?]+', text1) if len(s.strip()) > 20]
-    s2 = [s.strip() for s in re.split(r'[.!?]+', text2) if len(s.strip()) > 20]
-    
-    if not s1 or not s2: return []
-    
-    try:
-        vectorizer = TfidfVectorizer()
-        all_s = s1 + s2
-        vectors = vectorizer.fit_transform(all_s)
-        
-        v1 = vectors[:len(s1)]
-        v2 = vectors[len(s1):]
-        
-        matches = []
-        for i, sent1 in enumerate(s1):
-            for j, sent2 in enumerate(s2):
-                sim = cosine_similarity(v1[i:i+1], v2[j:j+1])[0][0]
-                if sim >= threshold:
-                    matches.append((sent1, sent2, round(sim, 3)))
-        
-        # Sort by similarity score descending
-        return sorted(matches, key=lambda x: x[2], reverse=True)[:50]
-    except:
-        return []
+def highlight_all(text):
+    """Highlight a whole document, used for identical pairs"""
+    return f'<span class="highlight-red">{text}</span>'
 
 def highlight_text(text, sentences, is_first=True):
     result = text
@@ -646,15 +626,12 @@ if not st.session_state.analyzed:
     
     else:  # UPLOAD FILES
         # Determine supported file types
-        supported_types = ["txt"]
-        type_labels = ["TXT"]
+        supported_types = ["txt", "docx", "doc"]
+        type_labels = ["TXT", "DOC"]
         
         if PDF_SUPPORT:
             supported_types.append("pdf")
             type_labels.append("PDF")
-        if DOCX_SUPPORT:
-            supported_types.extend(["docx", "doc"])
-            type_labels.append("DOC")
         
         st.markdown("**UPLOAD DOCUMENTS** (TXT, DOC, or PDF)")
         
@@ -666,49 +643,119 @@ if not st.session_state.analyzed:
         )
         
         if uploaded_files:
+            # Byte-identical uploads are extracted once, and files seen in
+            # earlier scans are not extracted again
+            store = get_store()
+            extracted = {}
             for file in uploaded_files:
-                content = extract_text_from_file(file)
+                key = (file.name.split('.')[-1].lower(), content_hash(file.getvalue()))
+                if key not in extracted:
+                    extension, digest = key
+                    extracted[key] = store.file_text(digest, extension)
+                    if extracted[key] is None:
+                        extracted[key] = extract_text_from_file(file)
+                        if extracted[key]:
+                            store.save_file(digest, extension, file.name, extracted[key])
+                content = extracted[key]
                 if content:  # Only add if extraction was successful
                     texts.append(content)
                     names.append(file.name)
             
             if texts:
-                st.success(f"✓ Loaded {len(texts)} file(s)")
+                duplicates = len(uploaded_files) - len(extracted)
+                note = f" ({duplicates} duplicate upload(s))" if duplicates else ""
+                st.success(f"✓ Loaded {len(texts)} file(s){note}")
             else:
                 st.error("No valid text could be extracted from the uploaded files")
 
     # Action Bar
     st.markdown("<br>", unsafe_allow_html=True)
     
+    # Character n-grams resist homoglyph swaps and split words; hashing skips the vocabulary fit
+    backend = st.radio(
+        "MATCHING MODE",
+        VECTORIZER_BACKENDS,
+        index=VECTORIZER_BACKENDS.index(st.session_state.backend),
+        format_func=lambda b: BACKEND_LABELS[b],
+        horizontal=True
+    )
+    
     if len(texts) >= 2:
         if st.button("⚡ RUN PLAGIARISM ANALYSIS", use_container_width=True):
             with st.spinner("ANALYZING DOCUMENTS..."):
-                # Vectorize all texts
-                vecs = vectorize(texts)
-                results = []
+                graph = SimilarityGraph()
+                kept = []  # (score, i, j, identical) for every cluster edge
+                others = []  # min-heap of the best pairs outside the clusters
+                total_pairs = 0
+                
+                # Every pair goes straight to the CSV export as it is scored
+                report = io.StringIO()
+                report_writer = csv.writer(report)
+                report_writer.writerow(["a", "b", "score", "risk"])
                 
-                # Compare all pairs
-                for i in range(len(texts)):
-                    for j in range(i + 1, len(texts)):
-                        sim_score = similarity(vecs[i], vecs[j])
-                        
-                        if sim_score > 0.7:
-                            risk = "CRITICAL"
-                        elif sim_score > 0.4:
-                            risk = "MODERATE"
+                # Hashing scores do not depend on the rest of the corpus, so
+                # scores from earlier scans of the same documents are reused
+                store = get_store()
+                algorithm = algorithm_key(backend)
+                hashes = [text_hash(t) for t in texts]
+                reuse = backend == "hashing"
+                known = store.pair_scores(hashes, algorithm) if reuse else {}
+                new_scores = {}
+                reused = 0
+                
+                # Compare all pairs, scoring identical documents only once
+                for i, j, sim_score, identical in score_unique_pairs(texts, backend, known):
+                    if reuse and not identical:
+                        key = pair_key(hashes[i], hashes[j])
+                        if key in known:
+                            reused += 1
                         else:
-                            risk = "LOW"
-                        
-                        results.append({
-                            "a": names[i],
-                            "b": names[j],
-                            "score": sim_score,
-                            "risk": risk,
-                            "text_a": texts[i],
-                            "text_b": texts[j]
-                        })
+                            new_scores[key] = sim_score
+                    total_pairs += 1
+                    report_writer.writerow([names[i], names[j], sim_score, risk_level(sim_score)])
+                    pair = (sim_score, i, j, identical)
+                    if graph.add_edge(i, j, sim_score):
+                        kept.append(pair)
+                    elif len(others) < REPORT_TOP_PAIRS:
+                        heapq.heappush(others, pair)
+                    else:
+                        heapq.heappushpop(others, pair)
+                
+                # Only clustered pairs and the best of the rest reach the report
+                results = []
+                result_index = {}
+                for sim_score, i, j, identical in sorted(kept + others, reverse=True):
+                    result_index[(i, j)] = len(results)
+                    results.append({
+                        "a": names[i],
+                        "b": names[j],
+                        "score": sim_score,
+                        "risk": risk_level(sim_score),
+                        "identical": identical,
+                        "doc_a": i,
+                        "doc_b": j
+                    })
+                
+                # Groups of documents linked by MODERATE or higher scores
+                clusters = []
+                for cluster in graph.clusters():
+                    clusters.append({
+                        "names": [names[m] for m in cluster["members"]],
+                        "size": cluster["size"],
+                        "mean_score": cluster["mean_score"],
+                        "pairs": [result_index[(i, j)] for i, j, _ in cluster["edges"]]
+                    })
+                
+                store.save_documents(zip(names, texts))
+                store.save_pair_scores(new_scores, algorithm)
                 
                 st.session_state.results = results
+                st.session_state.texts = texts
+                st.session_state.total_pairs = total_pairs
+                st.session_state.report_csv = report.getvalue().encode()
+                st.session_state.clusters = clusters
+                st.session_state.backend = backend
+                st.session_state.reused = reused
                 st.session_state.analyzed = True
                 st.rerun()
     elif len(texts) == 1:
@@ -719,6 +766,8 @@ if not st.session_state.analyzed:
 else:
     # --- REPORT MODE ---
     results = st.session_state.results
+    texts = st.session_state.texts
+    clusters = st.session_state.clusters
     
     # Pair selector if multiple results
     if len(results) > 1:
@@ -728,35 +777,55 @@ else:
                 MULTIPLE COMPARISONS DETECTED
             </span>
             <div style="font-size: 14px; margin-top: 8px;">
-                Found {len(results)} pair(s) to analyze. Select a pair below to view detailed results.
+                Compared {st.session_state.total_pairs} pair(s), found {len(clusters)} cluster(s) of related documents, {st.session_state.reused} score(s) reused from earlier scans. Pairs in clusters and the {REPORT_TOP_PAIRS} highest-scoring others are listed below; the CSV export has every pair.
             </div>
         </div>
         """, unsafe_allow_html=True)
         
+        candidates = results
+        if clusters:
+            # Clusters ranked by size, then mean score
+            st.dataframe(
+                pd.DataFrame([{
+                    "CLUSTER": n + 1,
+                    "SIZE": c['size'],
+                    "MEAN SCORE": f"{c['mean_score']*100:.1f}%",
+                    "DOCUMENTS": ", ".join(c['names'])
+                } for n, c in enumerate(clusters)]),
+                hide_index=True,
+                use_container_width=True
+            )
+            # Opens on the top cluster; the last option shows all listed pairs
+            selected_cluster = st.selectbox(
+                "SELECT CLUSTER",
+                list(range(len(clusters))) + [None],
+                format_func=lambda n: f"ALL {len(results)} LISTED PAIRS" if n is None else
+                    f"CLUSTER {n + 1} · {clusters[n]['size']} DOCUMENTS · {clusters[n]['mean_score']*100:.1f}%",
+                label_visibility="collapsed"
+            )
+            if selected_cluster is not None:
+                candidates = [results[k] for k in clusters[selected_cluster]['pairs']]
+        
         # Create selector options
-        pair_options = [f"{r['a']} ↔ {r['b']}" for r in results]
-        selected_pair = st.selectbox(
+        pair_options = [
+            f"{r['a']} ↔ {r['b']}" + (" · IDENTICAL" if r['identical'] else "")
+            for r in candidates
+        ]
+        selected_index = st.selectbox(
             "SELECT COMPARISON PAIR",
-            pair_options,
+            range(len(candidates)),
+            format_func=lambda k: pair_options[k],
             label_visibility="collapsed"
         )
         
         # Get selected result
-        selected_index = pair_options.index(selected_pair)
-        res = results[selected_index]
+        res = candidates[selected_index]
     else:
         res = results[0]
     
     # Determine risk color based on score
-    if res['score'] > 0.7:
-        risk_color = "#c0392b"  # Dark red for critical
-        risk_label = "CRITICAL"
-    elif res['score'] > 0.4:
-        risk_color = "#f39c12"  # Orange for moderate
-        risk_label = "MODERATE"
-    else:
-        risk_color = "#27ae60"  # Green for low
-        risk_label = "LOW"
+    risk_label = risk_level(res['score'])
+    risk_color = RISK_COLORS[risk_label]
     
     # Section 02: Analysis Report
     render_section("02", "ANALYSIS REPORT")
@@ -768,6 +837,7 @@ else:
             <div>
                 <span style="font-size:12px; font-weight:700; color:{C['sub_text']}; letter-spacing:1px;">SIMILARITY SCORE</span>
                 <div style="font-size:48px; font-weight:900; line-height:1; margin-top:8px;">{res['score']*100:.1f}%</div>
+                <div style="font-size:12px; font-weight:700; color:{C['sub_text']}; letter-spacing:1px; margin-top:8px;">{BACKEND_LABELS[st.session_state.backend]}</div>
             </div>
             <div style="text-align:right;">
                 <span style="font-size:12px; font-weight:700; color:{C['sub_text']}; letter-spacing:1px;">RISK LEVEL</span>
@@ -790,18 +860,25 @@ else:
     # Section 03: Text Comparison
     render_section("03", "TEXT COMPARISON")
     
-    common_sents = get_common_sentences(res['text_a'], res['text_b'])
+    text_a = texts[res['doc_a']]
+    text_b = texts[res['doc_b']]
+    if res['identical']:
+        # Identical documents match in full, so skip sentence matching
+        safe_html_a = highlight_all(text_a)
+        safe_html_b = highlight_all(text_b)
+    else:
+        common_sents = find_common_sentences(text_a, text_b, st.session_state.backend)
+        safe_html_a = highlight_text(text_a, common_sents, True)
+        safe_html_b = highlight_text(text_b, common_sents, False)
     
     comp1, comp2 = st.columns(2, gap="large")
     
     with comp1:
         st.markdown(render_doc_label("DOCUMENT A"), unsafe_allow_html=True)
-        safe_html_a = highlight_text(res['text_a'], common_sents, True)
         st.markdown(f'<div class="compare-box">{safe_html_a}</div>', unsafe_allow_html=True)
         
     with comp2:
         st.markdown(render_doc_label("DOCUMENT B"), unsafe_allow_html=True)
-        safe_html_b = highlight_text(res['text_b'], common_sents, False)
         st.markdown(f'<div class="compare-box">{safe_html_b}</div>', unsafe_allow_html=True)
 
     # Section 04: Export
@@ -809,7 +886,7 @@ else:
     
     st.download_button(
         "⬇ DOWNLOAD CSV REPORT", 
-        pd.DataFrame(st.session_state.results).to_csv().encode(), 
+        st.session_state.report_csv, 
         "plagiarism_report.csv", 
         "text/csv",
         use_container_width=True
@@ -0,0 +1,388 @@
+"""Detection logic shared by the Streamlit app and the scoring service.
+
+Nothing in here touches Streamlit, so it can be imported from worker
+processes and from the headless service without starting a UI. Text
+extraction lives in plagr_extract.
+"""
+import collections
+import hashlib
+import re
+import threading
+import unicodedata
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import (
+    CountVectorizer,
+    HashingVectorizer,
+    TfidfTransformer,
+    TfidfVectorizer,
+)
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+
+# Risk bands used by the report and the service
+CRITICAL_THRESHOLD = 0.7
+MODERATE_THRESHOLD = 0.4
+
+# Bump when scoring, matching or sentence splitting changes, so results
+# kept by the result store are recomputed instead of reused
+ALGORITHM_VERSION = 1
+
+# Sentences shorter than this are ignored by sentence matching
+MIN_SENTENCE_LENGTH = 20
+
+
+# Common look-alike characters folded to ASCII, plus invisible characters
+# used to split words without changing how they render
+_HOMOGLYPHS = str.maketrans({
+    "а": "a", "в": "b", "е": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+    "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "ѕ": "s", "і": "i",
+    "ј": "j", "ԁ": "d", "ԛ": "q", "ԝ": "w", "ɡ": "g", "α": "a", "ε": "e",
+    "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p", "τ": "t", "υ": "u",
+    "χ": "x", "\u00ad": None, "\u200b": None, "\u200c": None,
+    "\u200d": None, "\u2060": None, "\ufeff": None,
+})
+
+
+def fold_text(text):
+    """Lowercase text and fold compatibility forms and homoglyphs to plain letters"""
+    return unicodedata.normalize("NFKC", text).lower().translate(_HOMOGLYPHS)
+
+
+# Options for the TF-IDF backends. Character n-grams span word boundaries,
+# so split or joined words and single swapped letters still share most grams.
+_TFIDF_OPTIONS = {
+    "word": {},
+    "char": {"analyzer": "char", "ngram_range": (3, 5), "preprocessor": fold_text},
+}
+VECTORIZER_BACKENDS = ("word", "char", "hashing")
+DEFAULT_BACKEND = "word"
+
+# Feature space of the hashing backend
+HASHING_FEATURES = 2 ** 20
+
+
+def make_vectorizer(backend=DEFAULT_BACKEND):
+    """Build an unfitted vectorizer for a backend
+
+    The hashing backend is stateless: it needs no vocabulary fit, so any
+    slice of a corpus can be transformed independently.
+    """
+    if backend == "hashing":
+        return HashingVectorizer(n_features=HASHING_FEATURES, alternate_sign=False)
+    if backend not in _TFIDF_OPTIONS:
+        raise ValueError(f"Unknown vectorizer backend: {backend}")
+    return TfidfVectorizer(**_TFIDF_OPTIONS[backend])
+
+
+# Document-level fits kept for repeat scans, keyed by (backend, texts,
+# weights). Sentence-level fits are one-off and never cached.
+FIT_CACHE_SIZE = 32
+_fit_cache = collections.OrderedDict()
+_fit_cache_lock = threading.Lock()
+
+
+def _cached_fit(key):
+    with _fit_cache_lock:
+        vectors = _fit_cache.get(key)
+        if vectors is not None:
+            _fit_cache.move_to_end(key)
+    return vectors
+
+
+def _cache_fit(key, vectors):
+    with _fit_cache_lock:
+        _fit_cache[key] = vectors
+        _fit_cache.move_to_end(key)
+        while len(_fit_cache) > FIT_CACHE_SIZE:
+            _fit_cache.popitem(last=False)
+
+
+def _weighted_tfidf(texts, weights, backend):
+    """TF-IDF vectors for distinct texts, as if text n occurred weights[n] times
+
+    Document frequencies count every occurrence, so each row equals the
+    row a fit over the corpus with its duplicates would give.
+    """
+    try:
+        counts = CountVectorizer(**_TFIDF_OPTIONS[backend]).fit_transform(texts)
+    except ValueError:
+        # Empty vocabulary: no text has a single term
+        return csr_matrix((len(texts), 1))
+    occurrences = np.asarray(weights, dtype=float)
+    df = (counts > 0).T.astype(float) @ occurrences
+    # Same smoothed IDF as TfidfTransformer
+    idf = np.log((1 + occurrences.sum()) / (1 + df)) + 1
+    return normalize(csr_matrix(counts.multiply(idf)))
+
+
+def vectorize(texts, backend=DEFAULT_BACKEND, weights=None):
+    """Sparse, L2-normalized document vectors for texts
+
+    weights optionally gives how many times each text occurs in the corpus
+    it stands for, so TF-IDF backends weigh terms as if the duplicates were
+    there. Results are cached per backend and corpus, so a repeat scan of
+    the same texts skips the fit. Treat the returned matrix as read-only.
+    """
+    texts = tuple(texts)
+    if backend == "hashing" or weights is None or all(w == 1 for w in weights):
+        weights = None
+    else:
+        weights = tuple(weights)
+    key = (backend, texts, weights)
+    vectors = _cached_fit(key)
+    if vectors is None:
+        if weights is None:
+            vectors = make_vectorizer(backend).fit_transform(texts)
+        else:
+            vectors = _weighted_tfidf(texts, weights, backend)
+        _cache_fit(key, vectors)
+    return vectors
+
+
+def risk_level(score):
+    """Map a similarity score to its risk band"""
+    if score > CRITICAL_THRESHOLD:
+        return "CRITICAL"
+    elif score > MODERATE_THRESHOLD:
+        return "MODERATE"
+    return "LOW"
+
+
+def content_hash(data):
+    """SHA-256 digest of raw file content"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def text_hash(text):
+    """SHA-256 digest of extracted text, used to key stored results"""
+    return content_hash(text.encode())
+
+
+def pair_key(hash_a, hash_b):
+    """Order-independent key for a pair of documents"""
+    return (hash_a, hash_b) if hash_a <= hash_b else (hash_b, hash_a)
+
+
+def algorithm_key(backend=DEFAULT_BACKEND):
+    """Identifies the backend and algorithm version that produced a result"""
+    return f"{backend}/v{ALGORITHM_VERSION}"
+
+
+def normalized_text_hash(text):
+    """SHA-256 digest of text with case and whitespace differences removed"""
+    return hashlib.sha256(" ".join(text.lower().split()).encode()).hexdigest()
+
+
+def dedupe(keys):
+    """Group items that share a key
+
+    Returns (representatives, group_of): the index of the first item in
+    each group, and the group number of every item.
+    """
+    groups = {}
+    representatives = []
+    group_of = []
+    for index, key in enumerate(keys):
+        if key not in groups:
+            groups[key] = len(representatives)
+            representatives.append(index)
+        group_of.append(groups[key])
+    return representatives, group_of
+
+
+def score_unique_pairs(texts, backend=DEFAULT_BACKEND, known=None):
+    """Score every pair of texts, vectorizing each distinct text only once
+
+    Texts that are equal after normalization form one group. Pairs inside a
+    group are reported as identical with a score of 1.0; other pairs reuse
+    the score of their groups' representatives. TF-IDF weights still count
+    every member of a group, so scores match score_corpora() on the same
+    texts. Yields (i, j, score, identical).
+
+    known optionally maps pair_key(text_hash(a), text_hash(b)) to a score
+    from an earlier scan. Those pairs are reused, and only the missing pairs
+    are computed. A TF-IDF score depends on the IDF weights of the whole
+    corpus, so known is only accepted for the stateless hashing backend.
+    """
+    if known and backend != "hashing":
+        raise ValueError("Stored scores can only be reused with the hashing backend")
+    representatives, group_of = dedupe([normalized_text_hash(t) for t in texts])
+    unique_texts = [texts[r] for r in representatives]
+    group_sizes = [0] * len(unique_texts)
+    for group in group_of:
+        group_sizes[group] += 1
+    known = known or {}
+    hashes = [text_hash(t) for t in unique_texts] if known else None
+    vectors = None
+
+    # Scores are produced one row at a time, so memory stays linear in the
+    # number of texts however many pairs there are
+    for i in range(len(texts)):
+        gi = group_of[i]
+        row = {}
+        missing = []
+        for gj in dict.fromkeys(group_of[i + 1:]):
+            if gj == gi:
+                continue
+            key = pair_key(hashes[gi], hashes[gj]) if known else None
+            if key in known:
+                row[gj] = known[key]
+            else:
+                missing.append(gj)
+        if missing:
+            if vectors is None:
+                vectors = vectorize(unique_texts, backend, group_sizes)
+            # Rows are L2-normalized, so the dot product is the cosine
+            row.update(zip(missing, (vectors[gi] @ vectors[missing].T).toarray().ravel()))
+        for j in range(i + 1, len(texts)):
+            gj = group_of[j]
+            if gj == gi:
+                yield i, j, 1.0, True
+            else:
+                yield i, j, float(row[gj]), False
+
+
+class SimilarityGraph:
+    """Sparse graph of document pairs that score above a threshold
+
+    Edges are added one at a time and merged into connected components with
+    a union-find, so only the pairs above the threshold are ever kept.
+    """
+
+    def __init__(self, threshold=MODERATE_THRESHOLD):
+        self.threshold = threshold
+        self._parent = {}
+        self._members = {}  # component root -> document indices
+        self._edges = {}  # component root -> [(i, j, score), ...]
+
+    def _find(self, node):
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _add_node(self, node):
+        if node not in self._parent:
+            self._parent[node] = node
+            self._members[node] = [node]
+            self._edges[node] = []
+
+    def add_edge(self, i, j, score):
+        """Record a scored pair, returning True if it joined the graph"""
+        if score <= self.threshold:
+            return False
+        self._add_node(i)
+        self._add_node(j)
+        root_i, root_j = self._find(i), self._find(j)
+        if root_i != root_j:
+            # Union by size, folding the smaller component into the larger
+            if len(self._members[root_i]) < len(self._members[root_j]):
+                root_i, root_j = root_j, root_i
+            self._parent[root_j] = root_i
+            self._members[root_i].extend(self._members.pop(root_j))
+            self._edges[root_i].extend(self._edges.pop(root_j))
+        self._edges[root_i].append((i, j, score))
+        return True
+
+    def clusters(self):
+        """Connected components, largest first, then by mean edge score"""
+        found = []
+        for root, members in self._members.items():
+            edges = self._edges[root]
+            found.append({
+                "members": sorted(members),
+                "edges": sorted(edges, key=lambda e: e[2], reverse=True),
+                "size": len(members),
+                "mean_score": sum(e[2] for e in edges) / len(edges),
+            })
+        return sorted(found, key=lambda c: (c["size"], c["mean_score"]), reverse=True)
+
+
+def _vectorize_batch(corpora, backend):
+    """Document vectors for several corpora, counting terms in one pass
+
+    For the TF-IDF backends, IDF weights are fitted per corpus, so each
+    corpus gets the same vectors (up to unused columns) as vectorize().
+    """
+    all_texts = [t for texts in corpora for t in texts]
+    if backend == "hashing":
+        matrix = make_vectorizer(backend).transform(all_texts)
+        weigh = None
+    elif backend in _TFIDF_OPTIONS:
+        try:
+            matrix = CountVectorizer(**_TFIDF_OPTIONS[backend]).fit_transform(all_texts)
+        except ValueError:
+            # Empty vocabulary: no text in the batch has a single term
+            matrix = csr_matrix((len(all_texts), 1))
+        weigh = TfidfTransformer
+    else:
+        raise ValueError(f"Unknown vectorizer backend: {backend}")
+
+    vectors = []
+    start = 0
+    for texts in corpora:
+        rows = matrix[start:start + len(texts)]
+        start += len(texts)
+        vectors.append(weigh().fit_transform(rows) if weigh is not None else rows)
+    return vectors
+
+
+def score_corpora(corpora, backend=DEFAULT_BACKEND):
+    """Score several independent lists of texts in one vectorization pass
+
+    Corpora already in the fit cache are reused; the rest are tokenized and
+    counted together, then cached. Each result matches what vectorize()
+    gives for that corpus alone. Texts without any terms score 0.0 against
+    everything, whatever else is in the batch.
+    """
+    corpora = [tuple(texts) for texts in corpora]
+    vectors = {texts: _cached_fit((backend, texts, None)) for texts in corpora}
+    pending = [texts for texts, rows in vectors.items() if rows is None]
+    if pending:
+        for texts, rows in zip(pending, _vectorize_batch(pending, backend)):
+            vectors[texts] = rows
+            _cache_fit((backend, texts, None), rows)
+
+    results = []
+    for texts in corpora:
+        sims = cosine_similarity(vectors[texts])
+        results.append([
+            (i, j, float(sims[i, j]))
+            for i in range(len(texts))
+            for j in range(i + 1, len(texts))
+        ])
+    return results
+
+
+def split_sentences(text):
+    # Split by simple punctuation
+    return [s.strip() for s in re.split(r'[.!?]+', text) if len(s.strip()) > MIN_SENTENCE_LENGTH]
+
+
+def get_common_sentences(text1, text2, threshold=0.65, backend=DEFAULT_BACKEND):
+    s1 = split_sentences(text1)
+    s2 = split_sentences(text2)
+
+    if not s1 or not s2: return []
+
+    try:
+        vectors = make_vectorizer(backend).fit_transform(s1 + s2)
+
+        v1 = vectors[:len(s1)]
+        v2 = vectors[len(s1):]
+        sims = cosine_similarity(v1, v2)
+
+        matches = []
+        for i, sent1 in enumerate(s1):
+            for j, sent2 in enumerate(s2):
+                sim = sims[i, j]
+                if sim >= threshold:
+                    matches.append((sent1, sent2, round(sim, 3)))
+
+        # Sort by similarity score descending
+        return sorted(matches, key=lambda x: x[2], reverse=True)[:50]
+    except:
+        return []
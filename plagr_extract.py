@@ -0,0 +1,190 @@
+"""Text extraction for the formats the detector accepts.
+
+Kept apart from plagr_core so extraction can be imported, and measured,
+without loading scikit-learn.
+"""
+import io
+import posixpath
+import re
+import zipfile
+from xml.etree import ElementTree
+
+# Document processing libraries
+try:
+    import PyPDF2
+    PDF_SUPPORT = True
+except ImportError:
+    PDF_SUPPORT = False
+
+# Bump when extraction output changes, so text kept by the result store is
+# extracted again instead of reused
+EXTRACTOR_VERSION = 1
+
+# WordprocessingML tags read by the streaming DOCX extractor
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_DOCX_CONTAINERS = {_W + "body", _W + "hdr", _W + "ftr", _W + "footnotes", _W + "endnotes"}
+_RELATIONSHIP = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+# Relationship types of the main part that hold text, in reading order
+_DOCX_RELATED_PARTS = ("footnotes", "endnotes", "header", "footer")
+
+
+class ExtractionError(Exception):
+    """Raised when text cannot be extracted from a document"""
+
+
+def extract_text_from_pdf(file):
+    """Extract text from PDF file"""
+    try:
+        pdf_reader = PyPDF2.PdfReader(file)
+        text = ""
+        for page in pdf_reader.pages:
+            text += page.extract_text() + "\n"
+        return text.strip()
+    except Exception as e:
+        raise ExtractionError(f"Error reading PDF: {str(e)}") from e
+
+
+def _relationships(archive, part, names):
+    """(type, part name) of each internal relationship of a part
+
+    The type is the last segment of the relationship type URI, which is the
+    same in transitional and strict packages. Pass "" for the package itself.
+    """
+    directory, name = posixpath.split(part)
+    rels = posixpath.join(directory, "_rels", name + ".rels")
+    if rels not in names:
+        return []
+    with archive.open(rels) as stream:
+        root = ElementTree.parse(stream).getroot()
+    found = []
+    for rel in root.iter(_RELATIONSHIP):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = posixpath.normpath(posixpath.join(directory, target))
+        found.append((rel.get("Type", "").rsplit("/", 1)[-1], target))
+    return found
+
+
+def _docx_parts(archive):
+    """Text-bearing parts of a DOCX package: body, notes, then headers and footers
+
+    The main part is the officeDocument target in _rels/.rels, which is not
+    always word/document.xml, and the other parts come from its own rels.
+    """
+    names = set(archive.namelist())
+    main = next(
+        (target for kind, target in _relationships(archive, "", names) if kind == "officeDocument"),
+        "word/document.xml",
+    )
+    related = _relationships(archive, main, names)
+
+    def natural(name):
+        return [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", name)]
+
+    parts = [main]
+    for wanted in _DOCX_RELATED_PARTS:
+        found = {target for kind, target in related if kind == wanted and target in names}
+        parts += sorted(found, key=natural)
+    return parts
+
+
+def _iter_part_paragraphs(stream):
+    """Yield paragraph text from one WordprocessingML part as it is parsed
+
+    Paragraphs inside tables and text boxes are yielded where they occur.
+    Each finished child of the body (or of the part root) is cleared so
+    memory stays flat however long the document is.
+    """
+    paragraphs = []  # text buffers, nested when a text box sits inside a paragraph
+    depth = 0
+    skip_depth = 0  # inside mc:Fallback copies of text boxes or w:tabs tab stops
+    container = None
+    container_depth = None
+
+    for event, elem in ElementTree.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            depth += 1
+            if tag == _MC_FALLBACK or tag == _W + "tabs":
+                skip_depth += 1
+            elif skip_depth:
+                pass
+            elif tag == _W + "p":
+                paragraphs.append([])
+            elif container is None and tag in _DOCX_CONTAINERS:
+                container = elem
+                container_depth = depth
+            continue
+
+        depth -= 1
+        if tag == _MC_FALLBACK or tag == _W + "tabs":
+            skip_depth -= 1
+        elif skip_depth or not paragraphs:
+            pass
+        elif tag == _W + "t":
+            paragraphs[-1].append(elem.text or "")
+        elif tag == _W + "tab":
+            paragraphs[-1].append("\t")
+        elif tag == _W + "br" or tag == _W + "cr":
+            paragraphs[-1].append("\n")
+        elif tag == _W + "p":
+            yield "".join(paragraphs.pop())
+            elem.clear()
+
+        if depth == container_depth:
+            container.clear()
+
+
+def iter_docx_text(file):
+    """Stream paragraph text from a DOCX file without loading the whole document
+
+    Covers the body (including tables and text boxes), footnotes, endnotes,
+    headers and footers, reading each part straight from the zip archive.
+    """
+    with zipfile.ZipFile(file) as archive:
+        for part in _docx_parts(archive):
+            with archive.open(part) as stream:
+                yield from _iter_part_paragraphs(stream)
+
+
+def extract_text_from_docx(file):
+    """Extract text from Word document"""
+    try:
+        return "\n".join(iter_docx_text(file)).strip()
+    except Exception as e:
+        raise ExtractionError(f"Error reading Word document: {str(e)}") from e
+
+
+def extract_text_from_file(file):
+    """Extract text from a named file object based on file type"""
+    file_extension = file.name.split('.')[-1].lower()
+
+    if file_extension == 'txt':
+        try:
+            return file.read().decode("utf-8", errors="ignore")
+        except Exception as e:
+            raise ExtractionError(f"Error reading text file: {str(e)}") from e
+
+    elif file_extension == 'pdf':
+        if not PDF_SUPPORT:
+            raise ExtractionError("PDF support not available. Please install PyPDF2: pip install PyPDF2")
+        return extract_text_from_pdf(file)
+
+    elif file_extension in ['docx', 'doc']:
+        return extract_text_from_docx(file)
+
+    else:
+        raise ExtractionError(f"Unsupported file type: {file_extension}")
+
+
+def extract_text_from_bytes(name, data):
+    """Extract text from raw file content, using name to pick the format"""
+    file = io.BytesIO(data)
+    file.name = name
+    return extract_text_from_file(file)
@@ -0,0 +1,345 @@
+"""Sharded reference corpus search.
+
+The reference corpus is split across shards. Each shard is owned by one
+worker process that holds its own document vectors and sentence index.
+A query is sent to every shard at once and the per-shard top-k results are
+merged into one global ranking.
+
+Shards use the stateless hashing backend, so every worker maps text into
+the same feature space and scores from different shards are comparable.
+Workers talk over multiprocessing connections. A shard can also run on
+another machine with serve_shard() and be attached with
+ShardedCorpus.connect().
+
+    python plagr_search.py reference_dir/ submission.docx --shards 4
+"""
+import argparse
+import heapq
+import os
+import threading
+import zlib
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+from scipy.sparse import vstack
+
+from plagr_core import make_vectorizer, split_sentences
+from plagr_extract import ExtractionError, extract_text_from_bytes
+
+DEFAULT_TOP_K = 10
+DEFAULT_SENTENCE_THRESHOLD = 0.65
+
+# Commands a shard worker accepts from the coordinator
+_SHARD_COMMANDS = {"add", "add_files", "search_many", "stats"}
+
+
+class ShardError(Exception):
+    """Raised when a shard worker fails to run a command"""
+
+
+class CorpusShard:
+    """Documents, vectors and sentence index owned by one worker"""
+
+    def __init__(self):
+        self._vectorizer = make_vectorizer("hashing")
+        self._doc_ids = []
+        self._id_set = set()
+        self._doc_blocks = []
+        self._sentence_refs = []  # (doc_id, sentence) per sentence row
+        self._sentence_blocks = []
+        self._docs = None
+        self._sentences = None
+
+    def add(self, documents):
+        """Index (doc_id, text) pairs, returning the shard's document count
+
+        A doc_id that is already indexed, or repeated in documents, keeps
+        only its latest text.
+        """
+        documents = list(dict(documents).items())
+        if not documents:
+            return len(self._doc_ids)
+        replaced = {doc_id for doc_id, _ in documents if doc_id in self._id_set}
+        if replaced:
+            self._remove(replaced)
+        self._doc_ids.extend(doc_id for doc_id, _ in documents)
+        self._id_set.update(doc_id for doc_id, _ in documents)
+        self._doc_blocks.append(self._vectorizer.transform([text for _, text in documents]))
+        refs = [(doc_id, s) for doc_id, text in documents for s in split_sentences(text)]
+        if refs:
+            self._sentence_refs.extend(refs)
+            self._sentence_blocks.append(self._vectorizer.transform([s for _, s in refs]))
+        self._docs = self._sentences = None
+        return len(self._doc_ids)
+
+    def _remove(self, doc_ids):
+        """Drop documents and their sentences, compacting the matrices"""
+        keep = [n for n, doc_id in enumerate(self._doc_ids) if doc_id not in doc_ids]
+        self._doc_blocks = [self._doc_matrix()[keep]]
+        self._doc_ids = [self._doc_ids[n] for n in keep]
+        self._id_set.difference_update(doc_ids)
+        if self._sentence_refs:
+            keep = [n for n, (doc_id, _) in enumerate(self._sentence_refs) if doc_id not in doc_ids]
+            self._sentence_blocks = [self._sentence_matrix()[keep]] if keep else []
+            self._sentence_refs = [self._sentence_refs[n] for n in keep]
+        self._docs = self._sentences = None
+
+    def add_files(self, files):
+        """Extract and index (doc_id, path) pairs on this worker
+
+        Returns the shard's document count and the (doc_id, error) pairs
+        for files that could not be read.
+        """
+        documents = []
+        failed = []
+        for doc_id, path in files:
+            try:
+                with open(path, "rb") as f:
+                    text = extract_text_from_bytes(os.path.basename(path), f.read())
+            except (OSError, ExtractionError) as e:
+                failed.append((doc_id, str(e)))
+                continue
+            if text:
+                documents.append((doc_id, text))
+        return self.add(documents), failed
+
+    def _doc_matrix(self):
+        if self._docs is None:
+            self._docs = vstack(self._doc_blocks).tocsr()
+        return self._docs
+
+    def _sentence_matrix(self):
+        if self._sentences is None:
+            self._sentences = vstack(self._sentence_blocks).tocsr()
+        return self._sentences
+
+    def search_many(self, queries, k=DEFAULT_TOP_K, threshold=DEFAULT_SENTENCE_THRESHOLD):
+        """Top-k documents and sentence matches in this shard for each query
+
+        Returns one (documents, sentences) pair per query, where documents
+        holds (score, doc_id) and sentences holds
+        (score, doc_id, query_sentence, reference_sentence).
+        """
+        if not self._doc_ids:
+            return [([], []) for _ in queries]
+        doc_sims = (self._vectorizer.transform(queries) @ self._doc_matrix().T).toarray()
+        results = []
+        for query, sims in zip(queries, doc_sims):
+            top = np.argpartition(-sims, min(k, len(sims)) - 1)[:k]
+            documents = [(float(sims[t]), self._doc_ids[t]) for t in top]
+            results.append((documents, self._match_sentences(query, k, threshold)))
+        return results
+
+    def _match_sentences(self, query, k, threshold):
+        query_sentences = split_sentences(query)
+        if not query_sentences or not self._sentence_refs:
+            return []
+        sims = (self._vectorizer.transform(query_sentences) @ self._sentence_matrix().T).tocoo()
+        mask = sims.data >= threshold
+        scores, rows, cols = sims.data[mask], sims.row[mask], sims.col[mask]
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+            scores, rows, cols = scores[top], rows[top], cols[top]
+        return [
+            (float(scores[n]), self._sentence_refs[cols[n]][0], query_sentences[rows[n]], self._sentence_refs[cols[n]][1])
+            for n in np.argsort(-scores, kind="stable")
+        ]
+
+    def stats(self):
+        return {"documents": len(self._doc_ids), "sentences": len(self._sentence_refs)}
+
+
+def _shard_loop(conn, shard=None):
+    """Answer coordinator commands on conn until it closes"""
+    shard = shard if shard is not None else CorpusShard()
+    while True:
+        try:
+            command, args = conn.recv()
+        except EOFError:
+            break
+        if command == "close":
+            break
+        if command not in _SHARD_COMMANDS:
+            conn.send(("error", f"Unknown shard command: {command}"))
+            continue
+        try:
+            conn.send(("ok", getattr(shard, command)(*args)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+def serve_shard(address, authkey):
+    """Host one shard at address for a remote coordinator
+
+    The shard keeps its documents across coordinator reconnects.
+    """
+    shard = CorpusShard()
+    with Listener(address, authkey=authkey) as listener:
+        while True:
+            with listener.accept() as conn:
+                _shard_loop(conn, shard)
+
+
+class ShardedCorpus:
+    """Coordinator that fans queries out to shard workers and merges results
+
+    Use start() for local worker processes or connect() for shards served
+    elsewhere with serve_shard(). Calls are serialized with a lock, so one
+    coordinator can be shared between threads.
+    """
+
+    def __init__(self, connections, processes=()):
+        self._connections = list(connections)
+        self._processes = list(processes)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, shards=None):
+        """Start one local worker process per shard (default: CPU count)"""
+        connections = []
+        processes = []
+        for _ in range(shards or os.cpu_count() or 1):
+            parent, child = Pipe()
+            process = Process(target=_shard_loop, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            connections.append(parent)
+            processes.append(process)
+        return cls(connections, processes)
+
+    @classmethod
+    def connect(cls, addresses, authkey):
+        """Attach to shards hosted with serve_shard()"""
+        return cls([Client(address, authkey=authkey) for address in addresses])
+
+    @property
+    def shards(self):
+        return len(self._connections)
+
+    def _shard_for(self, doc_id):
+        """Stable shard assignment, the same in every process"""
+        return zlib.crc32(str(doc_id).encode()) % len(self._connections)
+
+    def _call(self, calls):
+        """Send {shard: (command, args)} to every shard first, then collect replies"""
+        with self._lock:
+            for shard, message in calls.items():
+                self._connections[shard].send(message)
+            replies = {shard: self._connections[shard].recv() for shard in calls}
+        for shard, (status, value) in replies.items():
+            if status != "ok":
+                raise ShardError(f"Shard {shard}: {value}")
+        return {shard: value for shard, (_, value) in replies.items()}
+
+    def _partition(self, items):
+        parts = {}
+        for item in items:
+            parts.setdefault(self._shard_for(item[0]), []).append(item)
+        return parts
+
+    def add(self, documents):
+        """Index (doc_id, text) pairs, each on the shard that owns its id"""
+        parts = self._partition(documents)
+        self._call({shard: ("add", (docs,)) for shard, docs in parts.items()})
+
+    def add_files(self, paths):
+        """Index files by path; each shard extracts its own files
+
+        Returns (path, error) pairs for files that could not be read.
+        """
+        parts = self._partition([(path, path) for path in paths])
+        replies = self._call({shard: ("add_files", (files,)) for shard, files in parts.items()})
+        return [failure for _, failed in replies.values() for failure in failed]
+
+    def search_many(self, queries, k=DEFAULT_TOP_K, threshold=DEFAULT_SENTENCE_THRESHOLD):
+        """Global top-k documents and sentence matches for each query"""
+        queries = list(queries)
+        message = ("search_many", (queries, k, threshold))
+        replies = self._call({shard: message for shard in range(self.shards)})
+        results = []
+        for q in range(len(queries)):
+            documents = heapq.nlargest(k, (d for reply in replies.values() for d in reply[q][0]))
+            sentences = heapq.nlargest(k, (s for reply in replies.values() for s in reply[q][1]))
+            results.append({
+                "documents": [{"doc_id": doc_id, "score": score} for score, doc_id in documents],
+                "sentences": [
+                    {"doc_id": doc_id, "score": score, "query_sentence": query_sentence, "sentence": sentence}
+                    for score, doc_id, query_sentence, sentence in sentences
+                ],
+            })
+        return results
+
+    def search(self, query, k=DEFAULT_TOP_K, threshold=DEFAULT_SENTENCE_THRESHOLD):
+        return self.search_many([query], k, threshold)[0]
+
+    def stats(self):
+        """Document and sentence counts per shard"""
+        replies = self._call({shard: ("stats", ()) for shard in range(self.shards)})
+        return [replies[shard] for shard in range(self.shards)]
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.send(("close", ()))
+                except OSError:
+                    pass
+                conn.close()
+        for process in self._processes:
+            process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _parse_address(value):
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search a sharded reference corpus")
+    parser.add_argument("reference_dir", nargs="?", help="directory of reference documents")
+    parser.add_argument("query_file", nargs="?", help="document to search for")
+    parser.add_argument("--shards", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("-k", type=int, default=DEFAULT_TOP_K, help="results to show")
+    parser.add_argument("--serve", metavar="HOST:PORT", help="host one shard for a remote coordinator")
+    parser.add_argument("--authkey", default=os.environ.get("PLAGR_SHARD_AUTHKEY", ""),
+                        help="shared secret for --serve (default: $PLAGR_SHARD_AUTHKEY)")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        if not args.authkey:
+            parser.error("--serve requires --authkey or PLAGR_SHARD_AUTHKEY")
+        serve_shard(_parse_address(args.serve), args.authkey.encode())
+        return
+    if not args.reference_dir or not args.query_file:
+        parser.error("reference_dir and query_file are required")
+
+    with open(args.query_file, "rb") as f:
+        query = extract_text_from_bytes(os.path.basename(args.query_file), f.read())
+    paths = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(args.reference_dir)
+        for name in sorted(names)
+    ]
+
+    with ShardedCorpus.start(args.shards) as corpus:
+        for path, error in corpus.add_files(paths):
+            print(f"Skipped {path}: {error}")
+        result = corpus.search(query, args.k)
+
+    print(f"{'SCORE':>7}  DOCUMENT")
+    for match in result["documents"]:
+        print(f"{match['score'] * 100:6.1f}%  {match['doc_id']}")
+    for match in result["sentences"]:
+        print(f"\n{match['score'] * 100:6.1f}%  {match['doc_id']}\n  > {match['query_sentence']}\n  < {match['sentence']}")
+
+
+if __name__ == "__main__":
+    main()
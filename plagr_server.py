@@ -0,0 +1,459 @@
+"""Local HTTP scoring service for the plagiarism detector.
+
+Exposes extraction, pairwise scoring and sentence matching as JSON
+endpoints so other systems (such as an LMS submission hook) can call the
+detector without the Streamlit page. Everything runs on this machine.
+
+    python plagr_server.py --port 8765
+
+Endpoints:
+    GET  /health
+    GET  /metrics
+    POST /extract   {"name": "essay.docx", "content": "<base64 file bytes>"}
+    POST /score     {"texts": ["...", "..."], "names": ["a.txt", "b.txt"], "backend": "word"}
+    POST /matches   {"text_a": "...", "text_b": "...", "threshold": 0.65, "backend": "word"}
+
+"backend" is optional and is one of VECTORIZER_BACKENDS (word, char, hashing).
+
+Score requests that arrive within the batch window are merged into one
+vectorization pass. CPU work runs in a process pool.
+"""
+import argparse
+import base64
+import binascii
+import json
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from plagr_core import (
+    DEFAULT_BACKEND,
+    VECTORIZER_BACKENDS,
+    get_common_sentences,
+    risk_level,
+    score_corpora,
+)
+from plagr_extract import ExtractionError, extract_text_from_bytes
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 50 * 1024 * 1024
+
+
+class RequestError(Exception):
+    """Raised for malformed requests, carrying the HTTP status to return"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceError(Exception):
+    """Raised by ScoringClient when the service returns an error"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+class Metrics:
+    """Thread-safe request counters and latency samples per endpoint"""
+
+    def __init__(self, window=1024):
+        self._lock = threading.Lock()
+        self._window = window
+        self._started = time.monotonic()
+        self._endpoints = {}
+        self._batches = 0
+        self._batched_requests = 0
+        self._max_batch = 0
+
+    def observe(self, endpoint, seconds, ok=True):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = {"requests": 0, "errors": 0, "total_seconds": 0.0,
+                         "latencies": deque(maxlen=self._window)}
+                self._endpoints[endpoint] = stats
+            stats["requests"] += 1
+            stats["total_seconds"] += seconds
+            stats["latencies"].append(seconds)
+            if not ok:
+                stats["errors"] += 1
+
+    def observe_batch(self, size):
+        with self._lock:
+            self._batches += 1
+            self._batched_requests += size
+            self._max_batch = max(self._max_batch, size)
+
+    def snapshot(self):
+        with self._lock:
+            uptime = time.monotonic() - self._started
+            endpoints = {}
+            for name, stats in self._endpoints.items():
+                latencies = sorted(stats["latencies"])
+                endpoints[name] = {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "requests_per_second": stats["requests"] / uptime if uptime else 0.0,
+                    "mean_ms": 1000 * stats["total_seconds"] / stats["requests"],
+                    "p50_ms": 1000 * _percentile(latencies, 0.50),
+                    "p95_ms": 1000 * _percentile(latencies, 0.95),
+                    "max_ms": 1000 * latencies[-1],
+                }
+            return {
+                "uptime_seconds": uptime,
+                "endpoints": endpoints,
+                "batches": {
+                    "count": self._batches,
+                    "requests": self._batched_requests,
+                    "mean_size": self._batched_requests / self._batches if self._batches else 0.0,
+                    "max_size": self._max_batch,
+                },
+            }
+
+
+def _percentile(values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    return values[int(round(q * (len(values) - 1)))]
+
+
+class _Pending:
+    """A score request waiting for its batch to finish"""
+
+    def __init__(self, texts, backend):
+        self.texts = texts
+        self.backend = backend
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def resolve(self, result):
+        self._result = result
+        self._done.set()
+
+    def fail(self, error):
+        self._error = error
+        self._done.set()
+
+    def wait(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class MicroBatcher:
+    """Collects score requests that arrive together and scores them as one job
+
+    The first request opens a batch. Requests arriving within `window`
+    seconds join it, up to `max_batch`. The batch is handed to the executor,
+    one job per vectorizer backend, without blocking, so the next batch can
+    form while the pool works.
+    """
+
+    def __init__(self, executor, window=0.01, max_batch=32, metrics=None):
+        self._executor = executor
+        self._window = window
+        self._max_batch = max_batch
+        self._metrics = metrics
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="plagr-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts, backend=DEFAULT_BACKEND):
+        """Score one list of texts, blocking until its batch is done"""
+        pending = _Pending(texts, backend)
+        self._queue.put(pending)
+        return pending.wait()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self._window
+            closing = False
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+            if closing:
+                return
+
+    def _dispatch(self, batch):
+        if self._metrics is not None:
+            self._metrics.observe_batch(len(batch))
+        by_backend = {}
+        for pending in batch:
+            by_backend.setdefault(pending.backend, []).append(pending)
+        for backend, group in by_backend.items():
+            try:
+                future = self._executor.submit(score_corpora, [p.texts for p in group], backend)
+            except Exception as e:
+                for pending in group:
+                    pending.fail(e)
+                continue
+            future.add_done_callback(partial(self._resolve, group))
+
+    @staticmethod
+    def _resolve(batch, future):
+        try:
+            results = future.result()
+        except Exception as e:
+            for pending in batch:
+                pending.fail(e)
+            return
+        for pending, result in zip(batch, results):
+            pending.resolve(result)
+
+
+class ScoringService:
+    """Extraction, scoring and matching backed by a process pool"""
+
+    def __init__(self, workers=None, batch_window=0.01, max_batch=32):
+        self.metrics = Metrics()
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.batcher = MicroBatcher(self.executor, batch_window, max_batch, self.metrics)
+
+    def extract(self, name, data):
+        return self.executor.submit(extract_text_from_bytes, name, data).result()
+
+    def score(self, texts, names=None, backend=DEFAULT_BACKEND):
+        if names is None:
+            names = [f"Document {i + 1}" for i in range(len(texts))]
+        return [
+            {"a": names[i], "b": names[j], "score": score, "risk": risk_level(score)}
+            for i, j, score in self.batcher.submit(texts, backend)
+        ]
+
+    def matches(self, text_a, text_b, threshold=0.65, backend=DEFAULT_BACKEND):
+        found = self.executor.submit(get_common_sentences, text_a, text_b, threshold, backend).result()
+        return [
+            {"sentence_a": sent_a, "sentence_b": sent_b, "score": float(score)}
+            for sent_a, sent_b, score in found
+        ]
+
+    def close(self):
+        self.batcher.close()
+        self.executor.shutdown()
+
+
+def _require(payload, key, kind):
+    value = payload.get(key)
+    if not isinstance(value, kind):
+        raise RequestError(f"'{key}' is required and must be of type {kind.__name__}")
+    return value
+
+
+def _backend(payload):
+    backend = payload.get("backend", DEFAULT_BACKEND)
+    if backend not in VECTORIZER_BACKENDS:
+        raise RequestError(f"'backend' must be one of: {', '.join(VECTORIZER_BACKENDS)}")
+    return backend
+
+
+def _handle_extract(service, payload):
+    name = _require(payload, "name", str)
+    try:
+        data = base64.b64decode(_require(payload, "content", str), validate=True)
+    except binascii.Error:
+        raise RequestError("'content' must be base64 encoded")
+    try:
+        text = service.extract(name, data)
+    except ExtractionError as e:
+        raise RequestError(str(e), status=422)
+    return {"name": name, "text": text}
+
+
+def _handle_score(service, payload):
+    texts = _require(payload, "texts", list)
+    if len(texts) < 2 or not all(isinstance(t, str) for t in texts):
+        raise RequestError("'texts' must be a list of at least 2 strings")
+    names = payload.get("names")
+    if names is not None and (not isinstance(names, list) or len(names) != len(texts)):
+        raise RequestError("'names' must be a list with one entry per text")
+    return {"pairs": service.score(texts, names, _backend(payload))}
+
+
+def _handle_matches(service, payload):
+    text_a = _require(payload, "text_a", str)
+    text_b = _require(payload, "text_b", str)
+    threshold = payload.get("threshold", 0.65)
+    if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not 0 <= threshold <= 1:
+        raise RequestError("'threshold' must be a number between 0 and 1")
+    return {"matches": service.matches(text_a, text_b, threshold, _backend(payload))}
+
+
+POST_ROUTES = {
+    "/extract": _handle_extract,
+    "/score": _handle_score,
+    "/matches": _handle_matches,
+}
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    server_version = "PlagrScoring/1.0"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send(200, self.server.service.metrics.snapshot())
+        else:
+            self._send(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        handler = POST_ROUTES.get(self.path)
+        if handler is None:
+            self._send(404, {"error": f"Unknown path: {self.path}"})
+            return
+        started = time.monotonic()
+        ok = False
+        try:
+            body = handler(self.server.service, self._read_json())
+            self._send(200, body)
+            ok = True
+        except RequestError as e:
+            self._send(e.status, {"error": str(e)})
+        except Exception as e:
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+        finally:
+            self.server.service.metrics.observe(self.path, time.monotonic() - started, ok)
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise RequestError("Content-Length must be an integer")
+        if length < 0:
+            raise RequestError("Content-Length must not be negative")
+        if length > MAX_BODY_BYTES:
+            raise RequestError("Request body too large", status=413)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise RequestError("Request body must be valid JSON")
+        if not isinstance(payload, dict):
+            raise RequestError("Request body must be a JSON object")
+        return payload
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, ScoringRequestHandler)
+        self.service = service
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Bind a server for service; port 0 picks a free port"""
+    return ScoringHTTPServer((host, port), service)
+
+
+class ScoringClient:
+    """Minimal client for the scoring service"""
+
+    def __init__(self, base_url=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout=120):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, payload=None):
+        data = None if payload is None else json.dumps(payload).encode()
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise ServiceError(message, e.code) from None
+
+    def health(self):
+        return self._request("/health")
+
+    def metrics(self):
+        return self._request("/metrics")
+
+    def extract(self, name, data):
+        payload = {"name": name, "content": base64.b64encode(data).decode("ascii")}
+        return self._request("/extract", payload)["text"]
+
+    def score(self, texts, names=None, backend=DEFAULT_BACKEND):
+        payload = {"texts": texts, "backend": backend}
+        if names is not None:
+            payload["names"] = names
+        return self._request("/score", payload)["pairs"]
+
+    def matches(self, text_a, text_b, threshold=0.65, backend=DEFAULT_BACKEND):
+        payload = {"text_a": text_a, "text_b": text_b, "threshold": threshold, "backend": backend}
+        return self._request("/matches", payload)["matches"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local plagiarism scoring service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--batch-window-ms", type=float, default=10.0,
+                        help="how long to wait for score requests to batch together")
+    parser.add_argument("--max-batch", type=int, default=32,
+                        help="most score requests merged into one vectorization pass")
+    args = parser.parse_args(argv)
+
+    service = ScoringService(args.workers, args.batch_window_ms / 1000, args.max_batch)
+    server = make_server(service, args.host, args.port)
+    print(f"Scoring service listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Persistent scan results in a local SQLite database.
+
+Keeps document fingerprints, extracted text, pair scores and sentence
+matches between sessions so a re-scan with the hashing backend only
+computes pairs that involve new or changed documents. Files are keyed by
+content hash and EXTRACTOR_VERSION, and results by algorithm_key(), so
+changing the extractor, the backend or ALGORITHM_VERSION never reuses
+stale results.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from plagr_core import normalized_text_hash, pair_key, text_hash
+from plagr_extract import EXTRACTOR_VERSION
+
+DEFAULT_STORE_PATH = os.environ.get("PLAGR_STORE_PATH", "plagr_results.db")
+
+# Bump when a table's layout changes; older databases are migrated on open
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    content_hash TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    extractor_version INTEGER NOT NULL,
+    text_hash TEXT NOT NULL,
+    PRIMARY KEY (content_hash, extension, extractor_version)
+);
+CREATE TABLE IF NOT EXISTS documents (
+    text_hash TEXT PRIMARY KEY,
+    normalized_hash TEXT NOT NULL,
+    name TEXT NOT NULL,
+    text TEXT NOT NULL,
+    first_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pair_scores (
+    algorithm TEXT NOT NULL,
+    hash_a TEXT NOT NULL,
+    hash_b TEXT NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (algorithm, hash_a, hash_b)
+);
+CREATE TABLE IF NOT EXISTS sentence_matches (
+    algorithm TEXT NOT NULL,
+    hash_a TEXT NOT NULL,
+    hash_b TEXT NOT NULL,
+    matches TEXT NOT NULL,
+    PRIMARY KEY (algorithm, hash_a, hash_b)
+);
+"""
+
+
+class ResultStore:
+    """Embedded store for documents and scan results
+
+    One connection is shared between threads and guarded by a lock, which
+    suits the Streamlit app and the scoring service alike.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < 2:
+                # files gained extractor_version in its key; those files
+                # are simply extracted again
+                self._conn.execute("DROP TABLE IF EXISTS files")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def file_text(self, content_hash, extension):
+        """Text previously extracted from a file with this content, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT d.text FROM files f JOIN documents d ON d.text_hash = f.text_hash"
+                " WHERE f.content_hash = ? AND f.extension = ? AND f.extractor_version = ?",
+                (content_hash, extension, EXTRACTOR_VERSION),
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_file(self, content_hash, extension, name, text):
+        """Record a file's extracted text so later scans skip extraction"""
+        self.save_documents([(name, text)])
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                (content_hash, extension, EXTRACTOR_VERSION, text_hash(text)),
+            )
+
+    def save_documents(self, documents):
+        """Record the fingerprints and text of (name, text) pairs"""
+        now = time.time()
+        rows = [(text_hash(text), normalized_text_hash(text), name, text, now) for name, text in documents]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO documents VALUES (?, ?, ?, ?, ?)", rows)
+
+    def pair_scores(self, hashes, algorithm):
+        """Stored scores among hashes, as {pair_key: score}"""
+        hashes = json.dumps(sorted(set(hashes)))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT hash_a, hash_b, score FROM pair_scores WHERE algorithm = ?"
+                " AND hash_a IN (SELECT value FROM json_each(?))"
+                " AND hash_b IN (SELECT value FROM json_each(?))",
+                (algorithm, hashes, hashes),
+            ).fetchall()
+        return {(hash_a, hash_b): score for hash_a, hash_b, score in rows}
+
+    def save_pair_scores(self, scores, algorithm):
+        """Store {pair_key: score} computed with algorithm"""
+        rows = [(algorithm, hash_a, hash_b, float(score)) for (hash_a, hash_b), score in scores.items()]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO pair_scores VALUES (?, ?, ?, ?)", rows)
+
+    def sentence_matches(self, hash_a, hash_b, algorithm):
+        """Stored get_common_sentences() output for a pair, or None
+
+        Matches are returned oriented as (sentence from a, sentence from b,
+        score) whichever order the pair was stored in.
+        """
+        key = pair_key(hash_a, hash_b)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT matches FROM sentence_matches WHERE algorithm = ? AND hash_a = ? AND hash_b = ?",
+                (algorithm, *key),
+            ).fetchone()
+        if row is None:
+            return None
+        matches = [tuple(m) for m in json.loads(row[0])]
+        if key != (hash_a, hash_b):
+            matches = [(sent_b, sent_a, score) for sent_a, sent_b, score in matches]
+        return matches
+
+    def save_sentence_matches(self, hash_a, hash_b, matches, algorithm):
+        key = pair_key(hash_a, hash_b)
+        if key != (hash_a, hash_b):
+            matches = [(sent_b, sent_a, score) for sent_a, sent_b, score in matches]
+        payload = json.dumps([(sent_a, sent_b, float(score)) for sent_a, sent_b, score in matches])
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sentence_matches VALUES (?, ?, ?, ?)",
+                (algorithm, *key, payload),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,48 @@
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+import plagr_core
+from plagr_core import VECTORIZER_BACKENDS, fold_text, score_corpora, vectorize
+
+ORIGINAL = "copied essay passage"
+# Cyrillic look-alikes in every word, plus a zero-width space and soft hyphen
+DISGUISED = "сорied еssау pas\u200bsa\u00adge"
+
+CORPORA = [
+    ["the cat sat on the mat", "a dog sat on a log", "the cat ate the fish"],
+    ["alpha beta", "beta gamma", "alpha gamma delta"],
+    ["the cat sat on the mat", "a dog sat on a log"],
+]
+
+
+def test_fold_text_removes_homoglyphs_and_invisible_characters():
+    assert fold_text(DISGUISED) == ORIGINAL
+
+
+def test_char_backend_matches_disguised_text():
+    word = score_corpora([[ORIGINAL, DISGUISED]], "word")[0][0][2]
+    char = score_corpora([[ORIGINAL, DISGUISED]], "char")[0][0][2]
+    assert word == 0.0
+    assert char == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("backend", VECTORIZER_BACKENDS)
+def test_score_corpora_matches_vectorize(backend, monkeypatch):
+    monkeypatch.setattr(plagr_core, "_fit_cache", plagr_core.collections.OrderedDict())
+    batched = score_corpora(CORPORA, backend)
+    monkeypatch.setattr(plagr_core, "_fit_cache", plagr_core.collections.OrderedDict())
+    for texts, pairs in zip(CORPORA, batched):
+        sims = cosine_similarity(vectorize(texts, backend))
+        assert [score for _, _, score in pairs] == pytest.approx([sims[i, j] for i, j, _ in pairs])
+
+
+def test_fit_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(plagr_core, "_fit_cache", plagr_core.collections.OrderedDict())
+    monkeypatch.setattr(plagr_core, "FIT_CACHE_SIZE", 2)
+    plagr_core._cache_fit("a", 1)
+    plagr_core._cache_fit("b", 2)
+    assert plagr_core._cached_fit("a") == 1
+    plagr_core._cache_fit("c", 3)
+    assert plagr_core._cached_fit("b") is None
+    assert plagr_core._cached_fit("a") == 1
+    assert plagr_core._cached_fit("c") == 3
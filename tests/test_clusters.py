@@ -0,0 +1,33 @@
+from plagr_core import SimilarityGraph
+
+
+def test_threshold_is_strict():
+    graph = SimilarityGraph(threshold=0.4)
+    assert not graph.add_edge(0, 1, 0.4)
+    assert graph.add_edge(0, 2, 0.41)
+    assert [c["members"] for c in graph.clusters()] == [[0, 2]]
+
+
+def test_edges_merge_components():
+    graph = SimilarityGraph(threshold=0.4)
+    graph.add_edge(0, 1, 0.9)
+    graph.add_edge(2, 3, 0.8)
+    graph.add_edge(4, 5, 0.5)
+    graph.add_edge(1, 3, 0.6)
+    clusters = graph.clusters()
+    assert [c["members"] for c in clusters] == [[0, 1, 2, 3], [4, 5]]
+    assert clusters[0]["edges"] == [(0, 1, 0.9), (2, 3, 0.8), (1, 3, 0.6)]
+    assert clusters[0]["mean_score"] == (0.9 + 0.8 + 0.6) / 3
+
+
+def test_clusters_ordered_by_size_then_mean_score():
+    graph = SimilarityGraph(threshold=0.4)
+    graph.add_edge(0, 1, 0.5)
+    graph.add_edge(2, 3, 0.95)
+    graph.add_edge(4, 5, 0.6)
+    graph.add_edge(5, 6, 0.6)
+    assert [(c["size"], c["members"]) for c in graph.clusters()] == [
+        (3, [4, 5, 6]),
+        (2, [2, 3]),
+        (2, [0, 1]),
+    ]
@@ -0,0 +1,43 @@
+import pytest
+
+import plagr_core
+from plagr_core import VECTORIZER_BACKENDS, dedupe, score_corpora, score_unique_pairs
+
+TEXTS = [
+    "the cat sat on the mat today",
+    "The cat  sat on the MAT today",
+    "a dog ran in the park today",
+    "the cat ran in the park",
+]
+
+
+def test_dedupe_groups_by_key():
+    assert dedupe(["a", "b", "a", "c", "b"]) == ([0, 1, 3], [0, 1, 0, 2, 1])
+
+
+def test_identical_pairs_short_circuit(monkeypatch):
+    vectorized = []
+    vectorize = plagr_core.vectorize
+
+    def recording(texts, backend, weights=None):
+        vectorized.append(list(texts))
+        return vectorize(texts, backend, weights)
+
+    monkeypatch.setattr(plagr_core, "vectorize", recording)
+    pairs = list(score_unique_pairs(TEXTS, "word"))
+    assert vectorized == [[TEXTS[0], TEXTS[2], TEXTS[3]]]
+    assert pairs[0] == (0, 1, 1.0, True)
+    assert not any(identical for _, _, _, identical in pairs[1:])
+    # Both copies of the duplicate score the same against everything else
+    scores = {(i, j): score for i, j, score, _ in pairs}
+    assert scores[(0, 2)] == scores[(1, 2)]
+    assert scores[(0, 3)] == scores[(1, 3)]
+
+
+@pytest.mark.parametrize("backend", VECTORIZER_BACKENDS)
+def test_scores_match_score_corpora(backend):
+    texts = [TEXTS[0]] * 2 + TEXTS[2:]
+    expected = score_corpora([texts], backend)[0]
+    found = [(i, j, score) for i, j, score, _ in score_unique_pairs(texts, backend)]
+    assert [pair[:2] for pair in found] == [pair[:2] for pair in expected]
+    assert [pair[2] for pair in found] == pytest.approx([pair[2] for pair in expected])
@@ -0,0 +1,78 @@
+import io
+import zipfile
+
+from plagr_extract import extract_text_from_bytes, extract_text_from_docx
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+
+
+def paragraph(text):
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def relationships(*targets):
+    rels = "".join(
+        f'<Relationship Id="rId{n}" Type="{REL_TYPE}{kind}" Target="{target}"/>'
+        for n, (kind, target) in enumerate(targets, 1)
+    )
+    return f'<Relationships xmlns="{REL_NS}">{rels}</Relationships>'
+
+
+def make_docx(body, parts=(), main="document.xml"):
+    """Build a DOCX whose main part is word/<main>; parts are (type, name, xml)"""
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("_rels/.rels", relationships(("officeDocument", f"word/{main}")))
+        archive.writestr(f"word/{main}", f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>')
+        archive.writestr(f"word/_rels/{main}.rels", relationships(*[(kind, name) for kind, name, _ in parts]))
+        for _, name, xml in parts:
+            archive.writestr(f"word/{name}", xml)
+    return data.getvalue()
+
+
+def header(text):
+    return f'<w:hdr xmlns:w="{W_NS}">{paragraph(text)}</w:hdr>'
+
+
+def test_extracts_table_header_and_footnote():
+    data = make_docx(
+        paragraph("Body paragraph.")
+        + f"<w:tbl><w:tr><w:tc>{paragraph('Cell one.')}</w:tc><w:tc>{paragraph('Cell two.')}</w:tc></w:tr></w:tbl>"
+        + paragraph("After the table."),
+        [
+            ("header", "header1.xml", header("Header text.")),
+            ("footnotes", "footnotes.xml", f'<w:footnotes xmlns:w="{W_NS}"><w:footnote w:id="1">{paragraph("Footnote text.")}</w:footnote></w:footnotes>'),
+        ],
+    )
+    assert extract_text_from_docx(io.BytesIO(data)).split("\n") == [
+        "Body paragraph.",
+        "Cell one.",
+        "Cell two.",
+        "After the table.",
+        "Footnote text.",
+        "Header text.",
+    ]
+
+
+def test_main_part_and_headers_come_from_relationships():
+    data = make_docx(
+        paragraph("Main body text."),
+        [
+            ("header", "header10.xml", header("Second header.")),
+            ("header", "header2.xml", header("First header.")),
+        ],
+        main="document2.xml",
+    )
+    with zipfile.ZipFile(io.BytesIO(data), "a") as archive:
+        archive.writestr("word/header1.xml", header("Unreferenced header."))
+    assert extract_text_from_docx(io.BytesIO(data)).split("\n") == [
+        "Main body text.",
+        "First header.",
+        "Second header.",
+    ]
+
+
+def test_extract_from_bytes_picks_docx_by_name():
+    assert extract_text_from_bytes("essay.docx", make_docx(paragraph("Only paragraph."))) == "Only paragraph."
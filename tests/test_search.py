@@ -0,0 +1,59 @@
+from plagr_search import CorpusShard, ShardedCorpus
+
+TOPICS = [
+    "rivers carve deep valleys through the northern mountains",
+    "volcanic islands rise slowly from the floor of the ocean",
+    "honey bees communicate the location of flowers by dancing",
+    "medieval castles were built with thick walls and narrow windows",
+    "solar panels convert sunlight directly into electrical current",
+    "ancient traders crossed the desert with long camel caravans",
+    "coral reefs shelter thousands of species of colourful fish",
+    "glaciers store most of the fresh water found on the planet",
+]
+
+DOCUMENTS = [
+    (f"doc-{n}", f"Reference essay {n} explains how {topic}. It adds detail number {n} about {TOPICS[(n + 3) % len(TOPICS)]}.")
+    for n, topic in enumerate(TOPICS * 3)
+]
+
+QUERIES = [
+    "Everyone knows how rivers carve deep valleys through the northern mountains.",
+    "This essay explains how coral reefs shelter thousands of species of colourful fish.",
+    "Solar panels convert sunlight directly into electrical current on most roofs.",
+]
+
+
+def test_sharded_ranking_matches_single_shard():
+    with ShardedCorpus.start(1) as single, ShardedCorpus.start(3) as sharded:
+        single.add(DOCUMENTS)
+        sharded.add(DOCUMENTS)
+        assert sum(s["documents"] for s in sharded.stats()) == len(DOCUMENTS)
+        for expected, found in zip(single.search_many(QUERIES, k=5), sharded.search_many(QUERIES, k=5)):
+            assert [d["doc_id"] for d in found["documents"]] == [d["doc_id"] for d in expected["documents"]]
+            assert [d["score"] for d in found["documents"]] == [d["score"] for d in expected["documents"]]
+            assert found["sentences"] == expected["sentences"]
+
+
+def test_add_replaces_existing_doc_id():
+    shard = CorpusShard()
+    shard.add([("a", "The first version talks about rivers and mountains in the north.")])
+    count = shard.add([
+        ("a", "The second version talks about oceans and islands in the south."),
+        ("b", "An unrelated document about castles and their thick stone walls."),
+    ])
+    assert count == 2
+    assert shard.stats() == {"documents": 2, "sentences": 2}
+    documents, sentences = shard.search_many(["The second version talks about oceans and islands in the south."], k=1)[0]
+    assert documents[0][1] == "a"
+    assert documents[0][0] > 0.99
+    assert sentences[0][3] == "The second version talks about oceans and islands in the south"
+
+
+def test_sentence_matches_respect_threshold_and_k():
+    shard = CorpusShard()
+    shard.add(DOCUMENTS)
+    documents, sentences = shard.search_many([QUERIES[0]], k=2, threshold=0.5)[0]
+    assert len(documents) == 2
+    assert 0 < len(sentences) <= 2
+    assert all(score >= 0.5 for score, *_ in sentences)
+    assert [s[0] for s in sentences] == sorted((s[0] for s in sentences), reverse=True)
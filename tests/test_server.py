@@ -0,0 +1,57 @@
+import socket
+import threading
+
+import pytest
+
+from plagr_server import ScoringClient, ScoringService, ServiceError, make_server
+
+
+@pytest.fixture(scope="module")
+def client():
+    service = ScoringService(workers=1, batch_window=0.01)
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield ScoringClient(f"http://127.0.0.1:{server.server_port}")
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def test_round_trip(client):
+    assert client.health()["status"] == "ok"
+    text = "The students wrote about photosynthesis in plants and the role of chlorophyll."
+    assert client.extract("essay.txt", text.encode()) == text
+
+    pairs = client.score([text, text.upper(), "Unrelated notes on medieval castles."], names=["a", "b", "c"])
+    assert [(p["a"], p["b"]) for p in pairs] == [("a", "b"), ("a", "c"), ("b", "c")]
+    assert pairs[0]["score"] == pytest.approx(1.0)
+    assert pairs[0]["risk"] == "CRITICAL"
+
+    matches = client.matches(text, text.upper())
+    assert matches and matches[0]["score"] == pytest.approx(1.0)
+
+
+def test_empty_texts_score_zero(client):
+    assert client.score(["", ""])[0]["score"] == 0.0
+
+
+def test_rejects_bad_requests(client):
+    with pytest.raises(ServiceError) as error:
+        client.score(["a b c", "d e f"], backend="unknown")
+    assert error.value.status == 400
+    with pytest.raises(ServiceError) as error:
+        client.matches("first text here", "second text here", threshold=True)
+    assert error.value.status == 400
+    with pytest.raises(ServiceError) as error:
+        client.extract("notes.xyz", b"data")
+    assert error.value.status == 422
+
+
+@pytest.mark.parametrize("length", ["abc", "-1"])
+def test_rejects_bad_content_length(client, length):
+    host, port = client.base_url.rsplit("/", 1)[1].split(":")
+    with socket.create_connection((host, int(port)), timeout=10) as conn:
+        conn.sendall(f"POST /score HTTP/1.1\r\nHost: {host}\r\nContent-Length: {length}\r\n\r\n".encode())
+        status_line = conn.makefile("rb").readline()
+    assert status_line.split()[1] == b"400"
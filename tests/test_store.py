@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+import plagr_store
+from plagr_core import pair_key, score_unique_pairs, text_hash
+from plagr_store import ResultStore
+
+TEXTS = [
+    "Rivers carve deep valleys through the northern mountains over time.",
+    "Coral reefs shelter thousands of species of colourful fish.",
+    "Rivers carve deep valleys through the southern mountains over time.",
+    "Solar panels convert sunlight directly into electrical current.",
+]
+
+
+def test_rescan_reuses_known_scores():
+    full = list(score_unique_pairs(TEXTS, "hashing"))
+    hashes = [text_hash(t) for t in TEXTS]
+    # Stored scores are taken as given, however they differ from a fresh fit
+    known = {pair_key(hashes[i], hashes[j]): 0.5 for i, j, _, _ in full if j < 3}
+    rescored = list(score_unique_pairs(TEXTS, "hashing", known))
+    assert [(i, j) for i, j, _, _ in rescored] == [(i, j) for i, j, _, _ in full]
+    for (i, j, score, _), (_, _, fresh, _) in zip(rescored, full):
+        assert score == (0.5 if j < 3 else pytest.approx(fresh))
+
+
+def test_rescan_scores_stored_texts_never_paired():
+    full = list(score_unique_pairs(TEXTS, "hashing"))
+    hashes = [text_hash(t) for t in TEXTS]
+    known = {pair_key(hashes[0], hashes[1]): full[0][2], pair_key(hashes[2], hashes[3]): full[-1][2]}
+    rescored = list(score_unique_pairs(TEXTS, "hashing", known))
+    assert [s for _, _, s, _ in rescored] == pytest.approx([s for _, _, s, _ in full])
+
+
+def test_known_scores_rejected_for_tfidf():
+    known = {pair_key(text_hash(TEXTS[0]), text_hash(TEXTS[1])): 0.5}
+    with pytest.raises(ValueError):
+        list(score_unique_pairs(TEXTS, "word", known))
+
+
+def test_file_text_is_keyed_by_extractor_version(tmp_path, monkeypatch):
+    store = ResultStore(str(tmp_path / "results.db"))
+    store.save_file("abc", "txt", "essay.txt", "Extracted essay text.")
+    assert store.file_text("abc", "txt") == "Extracted essay text."
+    assert store.file_text("abc", "docx") is None
+    monkeypatch.setattr(plagr_store, "EXTRACTOR_VERSION", plagr_store.EXTRACTOR_VERSION + 1)
+    assert store.file_text("abc", "txt") is None
+    store.close()
+
+
+def test_opens_database_with_old_files_table(tmp_path):
+    path = str(tmp_path / "results.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE files (content_hash TEXT NOT NULL, extension TEXT NOT NULL,"
+        " text_hash TEXT NOT NULL, PRIMARY KEY (content_hash, extension))"
+    )
+    conn.execute("INSERT INTO files VALUES ('abc', 'txt', 'def')")
+    conn.commit()
+    conn.close()
+
+    store = ResultStore(path)
+    assert store.file_text("abc", "txt") is None
+    store.save_file("abc", "txt", "essay.txt", "Extracted essay text.")
+    assert store.file_text("abc", "txt") == "Extracted essay text."
+    store.close()